@@ -1,6 +1,11 @@
+import math
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 # --- PAGE CONFIGURATION ---
 # Set the page configuration for your Streamlit app.
@@ -12,6 +17,88 @@ st.set_page_config(
 )
 
 # --- DATA LOADING AND PREPROCESSING ---
+# Columns the dashboard reads (after standardization); everything else is skipped at read time
+DASHBOARD_COLUMNS = ['region', 'category', 'sub_category', 'segment', 'state', 'sales', 'profit']
+
+def standardize_column_name(name):
+    """Standardize a column name for consistency (e.g., 'Order Date' -> 'order_date')."""
+    return str(name).strip().lower().replace(' ', '_').replace('-', '_')
+
+def is_dashboard_column(name):
+    """True for the order date column and the columns listed in DASHBOARD_COLUMNS."""
+    col = standardize_column_name(name)
+    return col in DASHBOARD_COLUMNS or 'order_date' in col
+
+# Sidebar filter columns; each row's combination of their codes is stored as one bucket id
+FILTER_COLUMNS = ['Region', 'Category', 'Segment']
+FILTER_KEY_COLUMN = '_filter_key'
+# Above this many code combinations the bucket lookup table gets too large, and
+# filtering falls back to one code lookup per column
+MAX_FILTER_BUCKETS = 1_000_000
+
+# Label for a blank filter value, so those rows stay selectable and counted
+BLANK_FILTER_VALUE = '(blank)'
+
+def count_filter_buckets(df):
+    """Number of possible combinations of the FILTER_COLUMNS categories."""
+    return math.prod(len(df[col].cat.categories) for col in FILTER_COLUMNS)
+
+def filter_bucket_ids(df):
+    """
+    Combine the category codes of the FILTER_COLUMNS into a single int64 bucket id
+    per row (mixed radix, in column order). The filter columns hold no missing
+    values, so every code is a valid category.
+    """
+    bucket_ids = np.zeros(len(df), dtype='int64')
+    for col in FILTER_COLUMNS:
+        codes = df[col].cat.codes.to_numpy()
+        bucket_ids = bucket_ids * len(df[col].cat.categories) + codes
+    return bucket_ids
+
+# Candidate order date formats, tried in order (US month-first, as in the Superstore data)
+DATE_FORMATS = ['%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d']
+
+def infer_date_format(dates, sample_size=200):
+    """
+    Return the first of DATE_FORMATS that parses a sample of the date strings,
+    or None to fall back to pandas' own inference.
+    """
+    sample = dates.dropna().astype(str).head(sample_size)
+    for fmt in DATE_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt, errors='raise')
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+def read_csv_columns(file_source):
+    """
+    Read a CSV with PyArrow's multi-threaded parser, converting only the dashboard
+    columns. The header is peeked first to resolve their exact names in the file.
+    """
+    if isinstance(file_source, str):
+        header_source = data_source = file_source
+    else:
+        # Wrap the uploaded bytes once and give each reader its own BufferReader; the
+        # header peek and the full read must not share the upload's stream position
+        buffer = pa.py_buffer(file_source.getvalue())
+        header_source, data_source = pa.BufferReader(buffer), pa.BufferReader(buffer)
+
+    read_options = pacsv.ReadOptions(encoding="ISO-8859-1")
+    reader = pacsv.open_csv(header_source, read_options=read_options)
+    header = reader.schema.names
+    reader.close()
+
+    # strings_can_be_null reads blank text cells as missing, as pd.read_csv does,
+    # instead of as empty strings that would show up as a '' filter option
+    convert_options = pacsv.ConvertOptions(
+        include_columns=[col for col in header if is_dashboard_column(col)],
+        strings_can_be_null=True,
+    )
+    table = pacsv.read_csv(data_source, read_options=read_options, convert_options=convert_options)
+    return table.to_pandas()
+
 @st.cache_data  # Cache the data loading to improve performance
 def load_data(file_source):
     """
@@ -26,16 +113,19 @@ def load_data(file_source):
             file_name = file_source.name
 
         if file_name.endswith('.csv'):
-            df = pd.read_csv(file_source, encoding="ISO-8859-1")
-        elif file_name.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(file_source, engine='openpyxl')
+            df = read_csv_columns(file_source)
+        elif file_name.endswith('.xlsx'):
+            df = pd.read_excel(file_source, engine='openpyxl', usecols=is_dashboard_column)
+        elif file_name.endswith('.xls'):
+            # Legacy binary workbooks (like the bundled sample) need xlrd, not openpyxl
+            df = pd.read_excel(file_source, engine='xlrd', usecols=is_dashboard_column)
         else:
             st.error("Unsupported file format. Please use a CSV or Excel file.")
             return None
 
         # --- DATA CLEANING AND PREPARATION ---
         # Standardize column names for consistency (e.g., 'Order Date' -> 'order_date')
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
+        df.columns = [standardize_column_name(col) for col in df.columns]
 
         # Find the correct date column dynamically
         date_col = next((col for col in df.columns if 'order_date' in col), None)
@@ -43,13 +133,49 @@ def load_data(file_source):
             st.error("Could not find an 'Order Date' column in the data.")
             return None
         
-        # Convert the date column to datetime objects, coercing errors
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        # Convert the date column to datetime objects, coercing errors. Excel files
+        # already yield datetimes; text dates are parsed with an explicit format so
+        # pandas uses its vectorized strptime path instead of per-element inference
+        if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            date_format = infer_date_format(df[date_col])
+            df[date_col] = pd.to_datetime(df[date_col], format=date_format, cache=True, errors='coerce')
         # Drop any rows where the date conversion resulted in a null value
         df.dropna(subset=[date_col], inplace=True)
 
-        # Create a 'month_year' column for time-series analysis
-        df['month_year'] = df[date_col].dt.to_period('M').astype(str)
+        # Create a 'month_year' key for time-series analysis. It is stored as an
+        # int32 (year * 12 + month - 1), so grouping uses integer keys and only the
+        # aggregated months are formatted as 'YYYY-MM' labels
+        dates = df[date_col].dt
+        df['month_year'] = (dates.year * 12 + dates.month - 1).astype('int32')
+
+        # Rename columns to a consistent format for dashboard logic
+        df.rename(columns={
+            'region': 'Region', 'category': 'Category', 'segment': 'Segment', 
+            'sales': 'Sales', 'profit': 'Profit', 'sub_category': 'Sub-Category',
+            'state': 'State', 'month_year': 'Month-Year'
+        }, inplace=True, errors='ignore')
+
+        # Blank filter values become their own category, so those rows show up as a
+        # default-selected option instead of silently dropping out of every total
+        for col in FILTER_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].fillna(BLANK_FILTER_VALUE)
+
+        # Store the filter and grouping columns as categoricals so filtering and
+        # groupby work on small integer codes instead of hashing strings
+        for col in ['Region', 'Category', 'Segment', 'Sub-Category', 'State']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        # Cent-level precision is plenty for dollar amounts, so store them as float32
+        # to halve the memory traffic of every filter and aggregation pass
+        for col in ['Sales', 'Profit']:
+            if col in df.columns:
+                df[col] = df[col].astype('float32')
+
+        # Precompute the filter bucket of every row so filtering is a single table lookup
+        if all(col in df.columns for col in FILTER_COLUMNS) and count_filter_buckets(df) <= MAX_FILTER_BUCKETS:
+            df[FILTER_KEY_COLUMN] = filter_bucket_ids(df)
         
         return df
 
@@ -57,6 +183,144 @@ def load_data(file_source):
         st.error(f"Error processing the file: {e}")
         return None
 
+SAMPLE_DATA_PATH = "data/Sample - Superstore.xls"
+SAMPLE_CACHE_PATH = "data/superstore.parquet"  # Preprocessed copy of the sample data
+
+@st.cache_data
+def load_sample_data(path=SAMPLE_DATA_PATH, cache_path=SAMPLE_CACHE_PATH):
+    """
+    Load the bundled sample dataset. The preprocessed frame is written to Parquet
+    on first run, so later cold starts skip the Excel parse and date conversion.
+    The cache is rebuilt whenever the source data or this script is newer than it.
+    """
+    # A deployment may ship the cache without the source file; the cache then stands in for it
+    source_mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+    cache_is_fresh = (
+        os.path.exists(cache_path) and
+        os.path.getmtime(cache_path) >= max(source_mtime, os.path.getmtime(__file__))
+    )
+    if cache_is_fresh:
+        try:
+            # Memory-map the file so the OS pages columns in on demand, and let the
+            # Arrow buffers be released as each column is converted to pandas
+            with pa.memory_map(cache_path, 'r') as source:
+                table = pq.read_table(source)
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except (pa.ArrowInvalid, OSError):
+            pass  # A corrupt or unreadable cache is rebuilt from the source file below
+
+    df = load_data(path)
+    if df is not None:
+        # Write to a temporary file in the same directory and rename it into place, so an
+        # interrupted write never leaves a truncated cache that looks fresh
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            # Categorical dtypes round-trip through Parquet, so the cached copy is ready to use
+            df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Read-only deployments simply fall back to parsing the source file
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return df
+
+# --- CACHED FILTERS AND AGGREGATIONS ---
+# Filter selections are passed as sorted tuples so they are hashable and
+# order-independent; repeated interactions return the memoized results.
+@st.cache_data
+def filter_data(df, regions, categories, segments):
+    """
+    Return the rows matching the selected regions, categories and segments.
+    The selections are expanded into a table of allowed buckets, which is then
+    indexed with each row's precomputed bucket id in one vectorized pass. Data
+    with too many buckets for that table is filtered column by column instead.
+    """
+    selections = zip(FILTER_COLUMNS, (regions, categories, segments))
+    if FILTER_KEY_COLUMN not in df.columns:
+        mask = np.ones(len(df), dtype=bool)
+        for col, selected in selections:
+            mask &= df[col].cat.categories.isin(list(selected))[df[col].cat.codes.to_numpy()]
+        return df[mask]
+
+    allowed = np.ones((), dtype=bool)
+    for col, selected in selections:
+        allowed = np.logical_and.outer(allowed, df[col].cat.categories.isin(list(selected)))
+    return df[allowed.ravel()[df[FILTER_KEY_COLUMN].to_numpy()]]
+
+# Chart dimension behind each cube; a cube is only built when its column is present
+CUBE_DIMENSIONS = {'monthly': 'Month-Year', 'sub_category': 'Sub-Category', 'state': 'State'}
+
+@st.cache_data
+def dashboard_cubes(df):
+    """
+    Pre-aggregate sales and profit into a small cube per chart, keyed by the chart
+    dimension plus the filter columns. Each cube groups only on its own dimension,
+    so a row missing one dimension still counts towards the other charts.
+    Built once per dataset.
+    """
+    return {
+        name: df.groupby([dimension] + FILTER_COLUMNS, observed=True, sort=False)[['Sales', 'Profit']].sum()
+        for name, dimension in CUBE_DIMENSIONS.items()
+        if dimension in df.columns
+    }
+
+def select_cube(cube, regions, categories, segments):
+    """Return the rows of a pre-aggregated cube matching the filter selections."""
+    index = cube.index
+    return cube[
+        index.get_level_values('Region').isin(regions) &
+        index.get_level_values('Category').isin(categories) &
+        index.get_level_values('Segment').isin(segments)
+    ]
+
+def format_month_key(keys):
+    """Format integer month keys (year * 12 + month - 1) as 'YYYY-MM' labels."""
+    return [f"{key // 12}-{key % 12 + 1:02d}" for key in keys]
+
+@st.cache_data
+def agg_dashboard(cubes, regions, categories, segments):
+    """All chart aggregations for the filter selections, computed from the cubes."""
+    selection = (regions, categories, segments)
+
+    # Every row has a month, so the monthly cube also serves the category chart,
+    # Category being one of its filter levels
+    months = select_cube(cubes['monthly'], *selection)
+    # Keep the default sort here so the month keys come out in chronological order
+    monthly = months.groupby(level='Month-Year').sum().reset_index()
+    monthly['Month-Year'] = format_month_key(monthly['Month-Year'])
+
+    aggregates = {
+        'monthly': monthly,
+        'sales_by_category': months.groupby(level='Category', observed=True, sort=False)['Sales'].sum().sort_values(ascending=False),
+    }
+    if 'sub_category' in cubes:
+        products = select_cube(cubes['sub_category'], *selection)
+        aggregates['profit_by_subcat'] = products.groupby(level='Sub-Category', observed=True, sort=False)['Profit'].sum().sort_values(ascending=True)
+    if 'state' in cubes:
+        states = select_cube(cubes['state'], *selection)
+        aggregates['sales_by_state'] = states.groupby(level='State', observed=True, sort=False)[['Sales']].sum().reset_index()
+    return aggregates
+
+def warn_if_dimension_missing(df, dimension, value_col):
+    """
+    Warn when rows of `df` have no `dimension` value, since those rows are left out
+    of the chart grouped by it. The message gives their `value_col` total.
+    """
+    missing = df[dimension].isna().to_numpy()
+    if missing.any():
+        missing_total = df[value_col].to_numpy()[missing].sum(dtype='float64')
+        st.warning(
+            f"{missing.sum():,} rows without a '{dimension}' value "
+            f"(US $ {int(missing_total):,} {value_col.lower()}) are not shown in this chart."
+        )
+
+# --- RAW DATA TABLE PAGING ---
+RAW_TABLE_PAGE_SIZE = 1000  # Rows sent to the browser per "Load more" click
+
+def show_more_raw_rows():
+    """Button callback: grow the raw data table by one page."""
+    st.session_state['raw_rows_shown'] += RAW_TABLE_PAGE_SIZE
+
 # --- SIDEBAR ---
 with st.sidebar:
     st.header("Dashboard Controls")
@@ -77,40 +341,40 @@ with st.sidebar:
 # --- LOAD DATA (either uploaded or default sample) ---
 if uploaded_file is not None:
     df = load_data(uploaded_file)
+    dataset_id = uploaded_file.file_id
 else:
     # Load the default sample data if no file is uploaded
-    df = load_data("data/Sample - Superstore.xls")
+    df = load_sample_data()
+    dataset_id = SAMPLE_DATA_PATH
 
 
 # --- MAIN DASHBOARD (runs only if data is loaded successfully) ---
 if df is not None and not df.empty:
-    # Rename columns to a consistent format for dashboard logic
-    df.rename(columns={
-        'region': 'Region', 'category': 'Category', 'segment': 'Segment', 
-        'sales': 'Sales', 'profit': 'Profit', 'sub_category': 'Sub-Category',
-        'state': 'State', 'month_year': 'Month-Year'
-    }, inplace=True, errors='ignore')
-
     # --- Sidebar Filters (dynamically created from the loaded data) ---
     st.sidebar.header("Dashboard Filters")
-    region = st.sidebar.multiselect("Select Region:", options=df['Region'].unique(), default=df['Region'].unique())
-    category = st.sidebar.multiselect("Select Category:", options=df['Category'].unique(), default=df['Category'].unique())
-    segment = st.sidebar.multiselect("Select Segment:", options=df['Segment'].unique(), default=df['Segment'].unique())
+    # The filter columns are categoricals, so their options come straight from the
+    # categories instead of scanning every row with unique()
+    region_options = df['Region'].cat.categories.tolist()
+    category_options = df['Category'].cat.categories.tolist()
+    segment_options = df['Segment'].cat.categories.tolist()
+    region = st.sidebar.multiselect("Select Region:", options=region_options, default=region_options)
+    category = st.sidebar.multiselect("Select Category:", options=category_options, default=category_options)
+    segment = st.sidebar.multiselect("Select Segment:", options=segment_options, default=segment_options)
 
     # Apply filters to the DataFrame
-    df_filtered = df[
-        df['Region'].isin(region) &
-        df['Category'].isin(category) &
-        df['Segment'].isin(segment)
-    ]
+    selection = (tuple(sorted(region)), tuple(sorted(category)), tuple(sorted(segment)))
+    df_filtered = filter_data(df, *selection)
 
     # --- MAIN DASHBOARD LAYOUT ---
     st.title("📊 Dynamic Sales & Profitability Dashboard")
     st.markdown("---")
 
     # KPIs
-    total_sales = int(df_filtered['Sales'].sum())
-    total_profit = int(df_filtered['Profit'].sum())
+    # Accumulate the float32 columns in float64 so the headline totals stay exact to the dollar
+    exact_sales = df_filtered['Sales'].to_numpy().sum(dtype='float64')
+    exact_profit = df_filtered['Profit'].to_numpy().sum(dtype='float64')
+    total_sales = int(exact_sales)
+    total_profit = int(exact_profit)
     profit_margin = (total_profit / total_sales) * 100 if total_sales > 0 else 0
 
     col1, col2, col3 = st.columns(3)
@@ -121,35 +385,62 @@ if df is not None and not df.empty:
     st.markdown("---")
 
     # --- VISUALIZATIONS ---
+    # Imported here rather than at the top so a cold start without data skips
+    # plotly's import cost; later reruns reuse the already-loaded module
+    import plotly.express as px
+
     st.header("Monthly Sales & Profit Trend")
-    monthly_analysis = df_filtered.groupby('Month-Year').agg({'Sales':'sum', 'Profit':'sum'}).reset_index()
-    fig_monthly = px.line(monthly_analysis, x='Month-Year', y=['Sales', 'Profit'], title="Sales and Profit Over Time")
+    aggregates = agg_dashboard(dashboard_cubes(df), *selection)
+    monthly_analysis = aggregates['monthly']
+    fig_monthly = px.line(monthly_analysis, x='Month-Year', y=['Sales', 'Profit'], title="Sales and Profit Over Time", render_mode='webgl')
     fig_monthly.update_layout(xaxis={'type': 'category'})
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    st.plotly_chart(fig_monthly, width='stretch', key="fig_monthly")
 
     col_cat, col_subcat = st.columns(2)
     with col_cat:
         st.header("Sales by Category")
-        sales_by_category = df_filtered.groupby('Category')['Sales'].sum().sort_values(ascending=False)
+        sales_by_category = aggregates['sales_by_category']
         fig_cat_sales = px.bar(sales_by_category, orientation='h', text_auto='.2s', title="Total Sales by Category")
-        st.plotly_chart(fig_cat_sales, use_container_width=True)
+        st.plotly_chart(fig_cat_sales, width='stretch', key="fig_cat")
 
     with col_subcat:
         st.header("Profit by Sub-Category")
-        profit_by_subcat = df_filtered.groupby('Sub-Category')['Profit'].sum().sort_values(ascending=True)
-        fig_subcat_profit = px.bar(profit_by_subcat, orientation='h', text_auto='.2s', title="Total Profit by Sub-Category")
-        # Conditionally color bars: green for profit, red for loss
-        fig_subcat_profit.update_traces(marker_color=['#2ca02c' if x >= 0 else '#d62728' for x in profit_by_subcat.values])
-        st.plotly_chart(fig_subcat_profit, use_container_width=True)
+        if 'profit_by_subcat' in aggregates:
+            profit_by_subcat = aggregates['profit_by_subcat']
+            fig_subcat_profit = px.bar(profit_by_subcat, orientation='h', text_auto='.2s', title="Total Profit by Sub-Category")
+            # Conditionally color bars: green for profit, red for loss
+            fig_subcat_profit.update_traces(marker_color=np.where(profit_by_subcat.to_numpy() < 0, '#d62728', '#2ca02c'))
+            st.plotly_chart(fig_subcat_profit, width='stretch', key="fig_subcat")
+            warn_if_dimension_missing(df_filtered, 'Sub-Category', 'Profit')
+        else:
+            st.info("This chart needs a 'Sub-Category' column, which the data does not have.")
 
     st.header("Geographical Performance")
-    sales_by_state = df_filtered.groupby('State')['Sales'].sum().reset_index()
-    fig_geo = px.choropleth(sales_by_state, locations='State', locationmode="USA-states", color='Sales', scope="usa", title="Total Sales by State")
-    st.plotly_chart(fig_geo, use_container_width=True)
+    if 'sales_by_state' in aggregates:
+        sales_by_state = aggregates['sales_by_state']
+        fig_geo = px.choropleth(sales_by_state, locations='State', locationmode="USA-states", color='Sales', scope="usa", title="Total Sales by State")
+        st.plotly_chart(fig_geo, width='stretch', key="fig_geo")
+        warn_if_dimension_missing(df_filtered, 'State', 'Sales')
+    else:
+        st.info("This chart needs a 'State' column, which the data does not have.")
 
     # Display the filtered data in an expandable table
+    # Only a page of rows is serialized to the browser; the fixed height keeps the
+    # grid virtualized so only the visible rows are rendered client-side
     with st.expander("View Raw Data Table"):
-        st.dataframe(df_filtered)
+        # Start again from one page whenever the dataset or the filter selection changes
+        raw_table_view = (dataset_id, selection)
+        if st.session_state.get('raw_table_view') != raw_table_view:
+            st.session_state['raw_table_view'] = raw_table_view
+            st.session_state['raw_rows_shown'] = RAW_TABLE_PAGE_SIZE
+        rows_shown = st.session_state['raw_rows_shown']
+        raw_rows = df_filtered.head(rows_shown).drop(columns=FILTER_KEY_COLUMN, errors='ignore')
+        # Show the integer month key as its 'YYYY-MM' label, as in the charts
+        raw_rows['Month-Year'] = format_month_key(raw_rows['Month-Year'])
+        st.dataframe(raw_rows, height=400, width='stretch')
+        if rows_shown < len(df_filtered):
+            st.caption(f"Showing {rows_shown:,} of {len(df_filtered):,} rows.")
+            st.button("Load more rows", on_click=show_more_raw_rows)
 
 else:
     # This message shows when the app starts or if a file fails to load
@@ -0,0 +1,59 @@
+import importlib
+import io
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = [
+    'Row ID', 'Order ID', 'Order Date', 'Ship Date', 'Ship Mode', 'Customer ID',
+    'Customer Name', 'Segment', 'Country', 'City', 'State', 'Postal Code', 'Region',
+    'Product ID', 'Category', 'Sub-Category', 'Product Name', 'Sales', 'Quantity',
+    'Discount', 'Profit',
+]
+
+
+class Upload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile, which is a BytesIO with a name."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Importing app.py runs the dashboard script; from an empty directory the
+    # sample data is absent, so it renders the "no data" page and writes nothing
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(REPO_ROOT)
+    sys.modules.pop('app', None)
+    return importlib.import_module('app')
+
+
+def superstore_csv(n_rows):
+    lines = [','.join(HEADER)]
+    for i in range(n_rows):
+        lines.append(','.join([
+            str(i + 1), f'CA-2016-{i:06d}', f'{i % 12 + 1}/{i % 28 + 1}/2016', '11/11/2016',
+            'Second Class', f'CG-{i % 800:05d}', 'Claire Gute', 'Consumer', 'United States',
+            'Henderson', 'Kentucky', '42420', 'South', f'FUR-BO-{i:08d}', 'Furniture',
+            'Bookcases', '"Bush Somerset Collection Bookcase, with a long product name"',
+            '261.96', '2', '0', '41.9136',
+        ]))
+    return ('\n'.join(lines) + '\n').encode('ISO-8859-1')
+
+
+def test_read_csv_columns_reads_every_row_of_a_large_upload(app):
+    n_rows = 60_000
+    data = superstore_csv(n_rows)
+    assert len(data) > 10 * 1024 * 1024  # Spans several PyArrow read blocks
+
+    df = app.read_csv_columns(Upload(data, 'superstore.csv'))
+
+    assert len(df) == n_rows
+    assert sorted(df.columns) == sorted([
+        'Order Date', 'Segment', 'State', 'Region', 'Category', 'Sub-Category', 'Sales', 'Profit',
+    ])